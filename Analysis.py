@@ -0,0 +1,111 @@
+import numpy as np
+
+from Samples import RunRecord
+
+RUN_FIELDS = ("compression", "voltage", "current")
+
+
+def stack_runs(runs, field: str) -> np.ndarray:
+    """Stapelt ein Feld aller Läufe zu einer (Läufe × Ticks)-Matrix, kürzere Läufe werden mit NaN aufgefüllt."""
+    lengths = [len(run[field]) for run in runs]
+    matrix = np.full((len(runs), max(lengths, default=0)), np.nan)
+    for row, (run, length) in enumerate(zip(runs, lengths)):
+        matrix[row, :length] = np.asarray(run[field], dtype=float)
+    return matrix
+
+
+def surface_resistance(voltage: np.ndarray, current: np.ndarray, area_cm2: float = 5.0) -> np.ndarray:
+    """Vektorisierte Variante von calculate_surface_resistance (mΩ·cm², NaN bei Strom <= 0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resistance = voltage / current * area_cm2 * 1000
+    return np.where(current > 0, resistance, np.nan)
+
+
+def contact_pressure(compression: np.ndarray, calibration) -> np.ndarray:
+    """Kontaktdruck in MPa aus Federweg (mm) über die Lookup-Tabelle einer PressureCalibration (wie im Regler)."""
+    xs, ys, slopes = np.asarray(calibration.xs), np.asarray(calibration.ys), np.asarray(calibration.slopes)
+    i = np.clip(np.searchsorted(xs, compression, side="right") - 1, 0, len(slopes) - 1)
+    return ys[i] + slopes[i] * (compression - xs[i])
+
+
+def detect_contact(compression: np.ndarray, resistance: np.ndarray, threshold: float = 1e-3) -> np.ndarray:
+    """Index des ersten Ticks mit Federweg über der Schwelle und gültigem Widerstand, -1 ohne Kontakt."""
+    touching = (compression > threshold) & np.isfinite(resistance)
+    if touching.shape[1] == 0:
+        return np.full(touching.shape[0], -1)  # keine Ticks (leere Läufe)
+    return np.where(touching.any(axis=1), touching.argmax(axis=1), -1)
+
+
+def fit_power_law(pressure: np.ndarray, resistance: np.ndarray, mask: np.ndarray):
+    """Fit R = a · P^b je Zeile per linearer Regression im log-log-Raum (nur Punkte mit mask)."""
+    mask = mask & (pressure > 0) & (resistance > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.where(mask, np.log(pressure), 0.0)
+        y = np.where(mask, np.log(resistance), 0.0)
+        n = mask.sum(axis=1)
+        sx, sy = x.sum(axis=1), y.sum(axis=1)
+        sxx, sxy, syy = (x * x).sum(axis=1), (x * y).sum(axis=1), (y * y).sum(axis=1)
+
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx ** 2
+        var_y = n * syy - sy ** 2
+        b = cov / var_x
+        a = np.exp((sy - b * sx) / n)
+        r2 = cov ** 2 / (var_x * var_y)
+
+    valid = n >= 2
+    return np.where(valid, a, np.nan), np.where(valid, b, np.nan), np.where(valid, r2, np.nan)
+
+
+def analyze_runs(runs, calibration=None, area_cm2: float = None, contact_threshold: float = 1e-3) -> dict:
+    """
+    Analysiert beliebig viele aufgezeichnete Läufe in einem Aufruf.
+
+    Jeder Lauf ist ein RunRecord (Kalibrierung und Kontaktfläche werden aus dem Lauf übernommen)
+    oder ein Mapping mit den Sequenzen "compression", "voltage" und "current", z. B. ein SampleBatch;
+    dafür gelten calibration (PressureCalibration) und area_cm2.
+    Alle Ergebnisfelder sind Arrays mit einer Zeile bzw. einem Eintrag pro Lauf.
+    """
+    calibrations, areas, data = [], [], []
+    for run in runs:
+        is_record = isinstance(run, RunRecord)
+        data.append(run.samples if is_record else run)
+        calibrations.append(run.calibration if is_record and run.calibration else calibration)
+        areas.append(run.area_cm2 if is_record and run.area_cm2 else area_cm2)
+    if any(c is None for c in calibrations) or any(a is None for a in areas):
+        raise ValueError("Für jeden Lauf werden Kalibrierung und Kontaktfläche benötigt.")
+
+    compression, voltage, current = (stack_runs(data, field) for field in RUN_FIELDS)
+    resistance = surface_resistance(voltage, current, np.asarray(areas, dtype=float)[:, None])
+
+    # Druck je Kalibrierung gruppiert berechnen (üblicherweise teilen sich alle Läufe eine)
+    pressure = np.empty_like(compression)
+    for cal in {id(c): c for c in calibrations}.values():
+        rows = np.fromiter((c is cal for c in calibrations), dtype=bool, count=len(calibrations))
+        pressure[rows] = contact_pressure(compression[rows], cal)
+
+    contact_index = detect_contact(compression, resistance, contact_threshold)
+    ticks = np.arange(compression.shape[1])
+    after_contact = (contact_index[:, None] >= 0) & (ticks[None, :] >= contact_index[:, None])
+    found = contact_index >= 0
+    contact_compression = np.full(len(data), np.nan)
+    contact_compression[found] = compression[found, contact_index[found]]
+
+    fit_a, fit_b, fit_r2 = fit_power_law(pressure, resistance, after_contact)
+
+    return {
+        "compression"        : compression,
+        "pressure"           : pressure,
+        "resistance"         : resistance,
+        "contact_index"      : contact_index,
+        "contact_compression": contact_compression,
+        "fit_a"              : fit_a,
+        "fit_b"              : fit_b,
+        "fit_r2"             : fit_r2,
+    }
+
+
+def analyze_run(run, calibration=None, area_cm2: float = None, contact_threshold: float = 1e-3) -> dict:
+    """Analyse eines einzelnen Laufs; Ergebnisse ohne Lauf-Dimension."""
+    result = analyze_runs([run], calibration, area_cm2, contact_threshold)
+    return {key: value[0] for key, value in result.items()}
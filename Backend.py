@@ -1,9 +1,14 @@
+import itertools
 import math
 import threading
 import time
+from collections import deque
 from typing import Callable
 
 from MagneticSpringSensor import MagneticSpringSensor
+from PressureControl import ControlStats, PIController, PressureCalibration
+from RunStore import RunStore
+from Samples import NAN, RunRecord, Sample, SampleBatch
 
 
 class DummyPowerSupply:
@@ -24,8 +29,12 @@ class DummyPowerSupply:
 class DummyElevator:
     def __init__(self):
         self.position = 0.0
+        self.velocity = 0.0  # mm/s, nur im Druckregelbetrieb
         self.running = False
 
+    def setVelocity(self, velocity: float):
+        self.velocity = velocity
+
     def startMovement(self):
         self.running = True
 
@@ -36,15 +45,20 @@ class DummyElevator:
         self.position = 0.0
         self.running = False
 
-    def update(self):
+    def update(self, dt: float = None):
         if self.running:
-            self.position += 0.01  # Simuliere konstantes Anfahren
+            if dt is None:
+                self.position += 0.01  # Simuliere konstantes Anfahren
+            else:
+                self.position += self.velocity * dt  # Geschwindigkeitsvorgabe der Druckregelung
 
 
 class DummySpring:
     def __init__(self, elevator: DummyElevator):
         self.elevator = elevator
         self.contact_offset = 0.2  # Ab dieser Höhe beginnt Kontakt
+        self.spring_constant = 50.0
+        self.frame_rate = 100.0
 
     def getCompression(self) -> float:
         return max(0.0, self.elevator.position - self.contact_offset)
@@ -60,7 +74,7 @@ class DummyVoltmeter:
 
     def measVoltage(self) -> float:
         compression = self.spring.getCompression()
-        if compression > 0:
+        if compression is not None and compression > 0:  # None: Sensor liefert noch keinen Frame
             return 1.5 * (1 - math.exp(-3 * compression))  # Exponentiell ansteigende Spannung
         return 0.0
 
@@ -73,66 +87,149 @@ def calculate_surface_resistance(voltage: float, current: float, area_cm2: float
 
 
 class MeasurementBackend:
-    def __init__(self):
+    def __init__(self, current: float = 1.0, area_cm2: float = 5.0, target_compression: float = 0.5,
+                 settle_time: float = 1.0, tick_interval: float = 0.05, simulate: bool = False,
+                 max_runs: int = 100, target_pressure: float = None, kp: float = 20.0, ki: float = 2.0,
+                 control_rate: float = None, max_speed: float = 5.0, approach_speed: float = 1.0,
+                 pressure_tolerance: float = 0.02, control_timeout: float = 30.0,
+                 sweep: list = None, sweep_unit: str = "pressure", calibration: PressureCalibration = None,
+                 record_path: str = None):
+        self.current = current
+        self.area_cm2 = area_cm2
+        self.target_compression = target_compression
+        self.settle_time = settle_time
+        self.tick_interval = tick_interval
+
+        # Druckregelung (MPa): aktiv, sobald target_pressure gesetzt ist, sonst Abbruch bei target_compression
+        self.target_pressure = target_pressure
+        self.kp = kp  # (mm/s) / MPa
+        self.ki = ki
+        self.control_rate = control_rate  # Hz, Standard: Framerate des Sensors
+        self.max_speed = max_speed  # mm/s
+        self.approach_speed = approach_speed  # mm/s bis zum Kontakt
+        self.pressure_tolerance = pressure_tolerance  # MPa
+        self.control_timeout = control_timeout  # s
+
+        # Druck-/Federwegsweep: nach einmaligem Kontakt alle Stufen anfahren, halten und messen
+        if sweep_unit not in ("pressure", "compression"):
+            raise ValueError(f"Unbekannte Sweep-Einheit: {sweep_unit}")
+        self.sweep = sweep  # Zielwerte in MPa bzw. mm
+        self.sweep_unit = sweep_unit
+
         self.dps = DummyPowerSupply()
         self.elevator = DummyElevator()
-        # self.spring = DummySpring(self.elevator)
-        try:
-            self.spring = MagneticSpringSensor()
-        except Exception as e:
-            print("[Backend] Sensor nicht verfügbar – verwende DummySpring.")
+        if simulate:
             self.spring = DummySpring(self.elevator)
+        else:
+            try:
+                self.spring = MagneticSpringSensor()
+            except Exception as e:
+                print("[Backend] Sensor nicht verfügbar – verwende DummySpring.")
+                self.spring = DummySpring(self.elevator)
         self.voltmeter = DummyVoltmeter(self.elevator, self.spring)
+        # Federweg → Druck; ohne gemessene Kennlinie aus der Federkonstante des Sensors
+        self.calibration = calibration or PressureCalibration.from_spring(self.spring.spring_constant, self.area_cm2)
+        self.last_control_stats = None  # dict, beim Sweep Liste mit einem dict pro Stufe
         self.running = False
         self.stop_flag = threading.Event()
         self.thread = None
-
-    def start_measurement(self, callback: Callable[[dict], None], on_done: Callable[[], None] = lambda: None):
+        self.last_run = None  # Alle Samples des letzten Zyklus als SampleBatch (für Analysis/Export)
+        self.runs = deque(maxlen=max_runs)  # Die letzten max_runs Zyklen als RunRecord (Live-Zugriff)
+        # Vollständige Historie auf der Festplatte, Export und Filter lesen von dort
+        self.store = RunStore(record_path) if record_path else None
+        self.batch_label = None
+        self._run_ids = itertools.count((self.store.last_run_id() if self.store else 0) + 1)
+        self._history_warned = False
+
+    def start_measurement(self, callback: Callable[[Sample], None], on_done: Callable[[], None] = lambda: None,
+                          on_batch: Callable[[SampleBatch], None] = None, batch_size: int = 20):
         if self.running:
             return  # Messung läuft bereits
 
         def run():
-            self.running = True
-            self.stop_flag.clear()
+            try:
+                self.run_cycle(callback, on_batch, batch_size)
+            finally:
+                on_done()  # GUI auch nach einem Fehler wieder freigeben
 
-            self.dps.setCurrent(1.0)
-            self.dps.setOutput(True)
-            self.elevator.resetPosition()
-            self.elevator.startMovement()
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
 
-            while not self.stop_flag.is_set():
-                self.elevator.update()
-                compression = self.spring.getCompression()
-                voltage = self.voltmeter.measVoltage()
-                current = self.dps.readCurrent()
-                resistance = calculate_surface_resistance(voltage, current)
-
-                # Live-Rückgabe an GUI
-                callback({
-                    "elevator"   : round(self.elevator.position, 3),
-                    "compression": round(compression, 3),
-                    "voltage"    : round(voltage, 3),
-                    "current"    : round(current, 3),
-                    "resistance" : round(resistance, 2) if not math.isnan(resistance) else None
-                })
-
-                if compression >= 0.5:
-                    self.elevator.stopMovement()
-                    break
+    def run_cycle(self, callback: Callable[[Sample], None] = None,
+                  on_batch: Callable[[SampleBatch], None] = None, batch_size: int = 20):
+        """
+        Führt einen vollständigen Messzyklus synchron im aufrufenden Thread aus.
 
-                time.sleep(0.05)
+        callback erhält jedes Sample einzeln, on_batch gesammelt je batch_size Samples.
+        Gibt den RunRecord des Zyklus zurück.
+        """
+        self.running = True
+        self.stop_flag.clear()
+        self.last_run = SampleBatch()
+        targets, target_unit = self._targets()
+        record = RunRecord(next(self._run_ids), time.time(), self.batch_label, self.last_run, targets, target_unit,
+                           self.calibration, self.area_cm2)
+        if self.store is None and len(self.runs) == self.runs.maxlen and not self._history_warned:
+            print(f"[Backend] Nur die letzten {self.runs.maxlen} Zyklen werden gehalten – ältere werden verworfen "
+                  f"(record_path setzen, um alle zu speichern).")
+            self._history_warned = True
+        self.runs.append(record)
+        pending = SampleBatch()
+
+        def emit(sample: Sample):
+            nonlocal pending
+            self.last_run.append(sample)
+            if callback:
+                callback(sample)
+            if on_batch:
+                pending.append(sample)
+                if len(pending) >= batch_size:
+                    on_batch(pending)
+                    pending = SampleBatch()
 
-            if not self.stop_flag.is_set():
-                time.sleep(1.0)  # 1 Sekunde warten für finale Messung
-                voltage = self.voltmeter.measVoltage()
-                current = self.dps.readCurrent()
-                resistance = calculate_surface_resistance(voltage, current)
-                callback({
-                    "final"     : True,
-                    "voltage"   : round(voltage, 3),
-                    "current"   : round(current, 3),
-                    "resistance": round(resistance, 2) if not math.isnan(resistance) else None
-                })
+        try:
+            self.dps.setCurrent(self.current)
+            self.dps.setOutput(True)
+            self.elevator.resetPosition()
+            self.last_control_stats = None
+
+            if self.sweep:
+                self.last_control_stats = []
+                for target in self.sweep:
+                    pressure = target if self.sweep_unit == "pressure" else self.calibration.pressure(target)
+                    reached, stats = self._regulate_pressure(pressure, emit)
+                    self.last_control_stats.append(stats)
+                    if self.stop_flag.is_set():
+                        break
+                    record.reached.append(reached)
+                    emit(self._acquire(final=True))  # ein Ergebnis pro Stufe
+                    if not reached:
+                        print("[Backend] Sweep abgebrochen – Stufe nicht erreicht.")
+                        break
+            elif self.target_pressure is not None:
+                reached, self.last_control_stats = self._regulate_pressure(self.target_pressure, emit)
+            else:
+                reached = True
+                self.elevator.startMovement()
+                while not self.stop_flag.is_set():
+                    self.elevator.update()
+                    sample = self._acquire()
+
+                    # Live-Rückgabe an GUI
+                    emit(sample)
+
+                    if sample.compression >= self.target_compression:
+                        self.elevator.stopMovement()
+                        break
+
+                    time.sleep(self.tick_interval)
+
+                if not self.stop_flag.is_set():
+                    time.sleep(self.settle_time)  # Warten für finale Messung
+
+            if not self.sweep and not self.stop_flag.is_set():
+                record.reached.append(reached)
+                emit(self._acquire(final=True))
 
             # Rückfahren
             self.dps.setOutput(False)
@@ -143,15 +240,93 @@ class MeasurementBackend:
                 self.elevator.position -= 0.02  # Rückwärts schneller
                 if self.elevator.position < 0:
                     self.elevator.position = 0.0
-                callback({"elevator": round(self.elevator.position, 3)})
-                time.sleep(0.05)
+                emit(Sample(time.monotonic(), self.elevator.position))
+                time.sleep(self.tick_interval)
             self.elevator.stopMovement()
 
+            if on_batch and len(pending):
+                on_batch(pending)
+            if self.store:
+                self.store.append(record)
+        finally:
+            # Auch bei Abbruch/Exception: Strom aus, Elevator anhalten
+            self.dps.setOutput(False)
+            self.elevator.stopMovement()
             self.running = False
-            on_done()
-
-        self.thread = threading.Thread(target=run, daemon=True)
-        self.thread.start()
+        return record
+
+    def _targets(self):
+        """Zielwerte der Messpunkte des nächsten Zyklus und ihre Einheit."""
+        if self.sweep:
+            return list(self.sweep), self.sweep_unit
+        if self.target_pressure is not None:
+            return [self.target_pressure], "pressure"
+        return [self.target_compression], "compression"
+
+    def _acquire(self, final: bool = False) -> Sample:
+        t = time.monotonic()
+        compression = self.spring.getCompression()
+        if compression is None:
+            compression = NAN  # Sensor hat noch keinen gültigen Frame geliefert
+        voltage = self.voltmeter.measVoltage()
+        current = self.dps.readCurrent()
+        resistance = calculate_surface_resistance(voltage, current, self.area_cm2)
+        return Sample(t, self.elevator.position, compression, voltage, current, resistance, final)
+
+    def _regulate_pressure(self, target: float, emit: Callable[[Sample], None]):
+        """
+        Fährt bis zum Kontakt an und regelt dann per PI-Regler auf den Zieldruck (MPa).
+
+        Nach dem ersten Erreichen des Toleranzbands wird der Druck für settle_time gehalten.
+        Die Schleife läuft mit der Framerate des Sensors; Kennzahlen kommen aus ControlStats.
+        Gibt (erreicht, Kennzahlen) zurück, erreicht ist False bei Zeitüberschreitung oder Abbruch.
+        """
+        period = 1.0 / (self.control_rate or getattr(self.spring, "frame_rate", 100.0))
+        controller = PIController(self.kp, self.ki, -self.max_speed, self.max_speed)
+        stats = ControlStats(target, period, self.pressure_tolerance)
+
+        self.elevator.setVelocity(self.approach_speed)
+        self.elevator.startMovement()
+        start = last = next_tick = time.perf_counter()
+        hold_until = None
+        reached = False
+
+        while not self.stop_flag.is_set():
+            tick = time.perf_counter()
+            self.elevator.update(tick - last)
+            sample = self._acquire()
+
+            if math.isnan(sample.compression):
+                self.elevator.setVelocity(0.0)  # kein Sensorwert – nicht blind weiterfahren
+            elif sample.compression > 0:
+                pressure = self.calibration.pressure(sample.compression)
+                self.elevator.setVelocity(controller.update(target - pressure, tick - last))
+                stats.record(tick, time.perf_counter() - tick, pressure, hold_until is not None)
+                if hold_until is None and abs(target - pressure) <= self.pressure_tolerance:
+                    hold_until = tick + self.settle_time
+            else:
+                self.elevator.setVelocity(self.approach_speed)  # noch kein Kontakt
+            last = tick
+
+            emit(sample)
+
+            if hold_until is not None and tick >= hold_until:
+                reached = True
+                break
+            if tick - start > self.control_timeout:
+                print("[Backend] Zieldruck nicht erreicht – Zeitüberschreitung der Druckregelung.")
+                break
+
+            next_tick += period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # Zyklus verpasst, Takt neu aufsetzen
+
+        self.elevator.setVelocity(0.0)
+        self.elevator.stopMovement()
+        return reached, stats.summary()
 
     def stop(self):
         self.stop_flag.set()
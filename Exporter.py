@@ -0,0 +1,193 @@
+import csv
+import threading
+from array import array
+from datetime import datetime
+from typing import Callable, Iterable
+
+from Samples import DISPLAY_PRECISION, FIELDS, NAN, RunRecord
+
+SAMPLE_COLUMNS = ["run_id", "batch", "started"] + list(FIELDS) + ["final"]
+RESULT_COLUMNS = ["run_id", "batch", "started", "step", "target", "target_unit", "reached", "voltage", "current",
+                  "resistance"]
+WRITE_BUFFER = 1 << 20
+
+
+def filter_runs(runs: Iterable[RunRecord], start: float = None, end: float = None, batch=None):
+    """Filtert Läufe nach Startzeit (time.time(), inklusive Grenzen) und Batch-Bezeichnung."""
+    for run in runs:
+        if start is not None and run.started < start:
+            continue
+        if end is not None and run.started > end:
+            continue
+        if batch is not None and run.batch != batch:
+            continue
+        yield run
+
+
+def parse_time(text: str) -> float:
+    """ISO-Datum bzw. -Zeit ("2024-05-01" oder "2024-05-01 14:30") als time.time()-Wert, leer → None."""
+    text = (text or "").strip()
+    return datetime.fromisoformat(text).timestamp() if text else None
+
+
+def _fmt(value: float, field: str):
+    return "" if value != value else round(value, DISPLAY_PRECISION[field])
+
+
+def export_csv(runs: Iterable[RunRecord], path: str, results_only: bool = False, chunk_size: int = 5000,
+               progress: Callable[[int], None] = None) -> int:
+    """
+    Schreibt Läufe zeilenweise als CSV (ein Sample bzw. ein Ergebnis pro Zeile).
+
+    Zeilen werden in Blöcken von chunk_size gepuffert geschrieben, t ist relativ zum ersten Sample des Laufs.
+    Gibt die Anzahl exportierter Läufe zurück.
+    """
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_COLUMNS if results_only else SAMPLE_COLUMNS)
+        rows = []
+        for run in runs:
+            started = datetime.fromtimestamp(run.started).strftime("%Y-%m-%d %H:%M:%S")
+            if results_only:
+                for step, result in enumerate(run.results):
+                    rows.append([run.run_id, run.batch, started, step, run.target(step), run.target_unit,
+                                 run.target_reached(step), _fmt(result.voltage, "voltage"),
+                                 _fmt(result.current, "current"), _fmt(result.resistance, "resistance")])
+            else:
+                s = run.samples
+                t0 = s.t[0] if len(s) else 0.0
+                for t, elevator, compression, voltage, current, resistance, final in zip(
+                        s.t, s.elevator, s.compression, s.voltage, s.current, s.resistance, s.final):
+                    rows.append([run.run_id, run.batch, started, round(t - t0, 3), _fmt(elevator, "elevator"),
+                                 _fmt(compression, "compression"), _fmt(voltage, "voltage"),
+                                 _fmt(current, "current"), _fmt(resistance, "resistance"), final])
+
+            count += 1
+            if len(rows) >= chunk_size:
+                writer.writerows(rows)
+                rows.clear()
+            if progress:
+                progress(count)
+        writer.writerows(rows)
+    return count
+
+
+def export_parquet(runs: Iterable[RunRecord], path: str, results_only: bool = False, chunk_size: int = 100000,
+                   compression: str = "zstd", progress: Callable[[int], None] = None) -> int:
+    """
+    Schreibt Läufe spaltenweise als komprimierte Parquet-Datei (volle Genauigkeit, benötigt pyarrow).
+
+    Spalten werden direkt aus den SampleBatch-Arrays übernommen und je chunk_size Zeilen als Row Group geschrieben.
+    """
+    try:
+        # Erst hier importieren: pyarrow verlängert sonst jeden Start von CLI und GUI, auch beim reinen CSV-Export
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet-Export benötigt das Paket 'pyarrow'.")
+
+    columns = RESULT_COLUMNS if results_only else SAMPLE_COLUMNS
+    types = {"run_id": pa.int64(), "batch": pa.string(), "step": pa.int64(), "target_unit": pa.string(),
+             "reached": pa.bool_(), "final": pa.bool_()}
+    schema = pa.schema([(name, types.get(name, pa.float64())) for name in columns])
+
+    def empty():
+        chunk = {name: array("d") for name in columns}
+        chunk["run_id"] = array("q")
+        chunk["batch"] = []
+        if results_only:
+            chunk["step"] = array("q")
+            chunk["target_unit"] = []
+            chunk["reached"] = []
+        else:
+            chunk["final"] = array("b")
+        return chunk
+
+    def flush(writer, chunk):
+        data = {name: chunk[name] for name in columns}
+        if not results_only:
+            data["final"] = [bool(v) for v in chunk["final"]]
+        writer.write_table(pa.table(data, schema=schema))
+
+    count = 0
+    rows = 0
+    chunk = empty()
+    with pq.ParquetWriter(path, schema, compression=compression) as writer:
+        for run in runs:
+            if results_only:
+                results = run.results
+                n = len(results)
+                chunk["step"].extend(range(n))
+                chunk["target"].extend(NAN if run.target(step) is None else run.target(step) for step in range(n))
+                chunk["target_unit"].extend([run.target_unit] * n)
+                chunk["reached"].extend(run.target_reached(step) for step in range(n))
+                for result in results:
+                    chunk["voltage"].append(result.voltage)
+                    chunk["current"].append(result.current)
+                    chunk["resistance"].append(result.resistance)
+            else:
+                s = run.samples
+                n = len(s)
+                t0 = s.t[0] if n else 0.0
+                chunk["t"].extend(t - t0 for t in s.t)
+                for name in FIELDS[1:]:
+                    chunk[name].extend(s[name])
+                chunk["final"].extend(s.final)
+
+            chunk["run_id"].extend([run.run_id] * n)
+            chunk["batch"].extend([run.batch] * n)
+            chunk["started"].extend([run.started] * n)
+            rows += n
+            count += 1
+            if rows >= chunk_size:
+                flush(writer, chunk)
+                chunk, rows = empty(), 0
+            if progress:
+                progress(count)
+        if rows:
+            flush(writer, chunk)
+    return count
+
+
+def export_runs(runs: Iterable[RunRecord], path: str, **kwargs) -> int:
+    """Wählt das Format anhand der Dateiendung (.parquet oder .csv)."""
+    if path.lower().endswith(".parquet"):
+        return export_parquet(runs, path, **kwargs)
+    return export_csv(runs, path, **kwargs)
+
+
+class ExportJob(threading.Thread):
+    """Führt export_runs im Hintergrund aus, damit die GUI nicht blockiert."""
+
+    def __init__(self, runs, path: str, on_progress: Callable[[int, int], None] = None,
+                 on_done: Callable[[int, Exception], None] = None, **kwargs):
+        super().__init__(daemon=True)
+        # Listen werden als Momentaufnahme kopiert (das Backend zeichnet weiter auf); Iteratoren, z. B. über einen
+        # RunStore, werden erst beim Export gelesen – dann ist die Gesamtzahl unbekannt (total None)
+        self.total = len(runs) if hasattr(runs, "__len__") else None
+        self.runs = list(runs) if self.total is not None else runs
+        self.path = path
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.kwargs = kwargs
+
+    def run(self):
+        count, error = 0, None
+        try:
+            count = export_runs(self.runs, self.path, progress=self._progress, **self.kwargs)
+        except Exception as e:
+            error = e
+            print(f"[Exporter] Export fehlgeschlagen: {e}")
+        if self.on_done:
+            self.on_done(count, error)
+
+    def _progress(self, done: int):
+        # Nur bei Prozentsprüngen (bzw. alle 100 Läufe) melden, um die GUI nicht mit Updates zu fluten
+        total = self.total
+        if total is None:
+            changed = done % 100 == 0
+        else:
+            changed = done * 100 // total != (done - 1) * 100 // total or done == total
+        if self.on_progress and changed:
+            self.on_progress(done, total)
@@ -1,21 +1,39 @@
 import json
+import os
 import re
+import socket
+import time
 
 import serial
 from serial.tools import list_ports
 
+from SensorServer import DEFAULT_SOCKET_PATH, unpack_batches
+
 
 class MagneticSpringSensor:
     STRUCTURE_REGEX = re.compile(r'^\{"raw":.*?,"dst":.*?,"ocf":.*?,"cof":.*?,"lin":.*?\}$')
 
-    def __init__(self, port=None, baudrate=115200, spring_constant=50.0):
+    def __init__(self, port=None, baudrate=115200, spring_constant=50.0, socket_path=DEFAULT_SOCKET_PATH):
         self.baudrate = baudrate
         self.spring_constant = spring_constant
+        self.serial_port = port
         self.ser = None
+        self.sock = None
         self.buffer = ""
+        self.sock_buffer = bytearray()
         self.latest_displacement = None
+        self.frames_total = 0  # Fehlerstatistik des seriellen Parsers
+        self.struct_errors = 0
+        self.value_errors = 0
+        self.frame_rate = 100.0  # Hz, wird aus den empfangenen Frames laufend geschätzt
+        self._rate_count = 0
+        self._rate_start = self._rate_last = float("-inf")
 
         try:
+            # Läuft ein SensorServer, teilen wir uns dessen Port statt ihn selbst zu öffnen
+            if socket_path and os.path.exists(socket_path) and self.connect_server(socket_path):
+                self.port = socket_path
+                return
             self.port = port or self.auto_detect_port()
             self.connect()
         except Exception as e:
@@ -63,17 +81,85 @@ class MagneticSpringSensor:
             print(f"[MagneticSpringSensor] Connection failed: {e}")
             self.ser = None
 
+    def connect_server(self, socket_path) -> bool:
+        try:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_path)
+            self.sock.setblocking(False)
+            print(f"[MagneticSpringSensor] Connected to server {socket_path}")
+            return True
+        except OSError as e:
+            print(f"[MagneticSpringSensor] Server connection failed: {e}")
+            self.sock = None
+            return False
+
     def disconnect(self):
         if self.ser:
             self.ser.close()
             print(f"[MagneticSpringSensor] Disconnected")
             self.ser = None
+        if self.sock:
+            self.sock.close()
+            print(f"[MagneticSpringSensor] Disconnected from server")
+            self.sock = None
 
-    def _read_new_value(self):
+    def _read_server_frames(self) -> list:
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                chunk = b""
+            if not chunk:
+                print("[MagneticSpringSensor] Server closed connection")
+                self.sock.close()
+                self.sock = None
+                self.sock_buffer.clear()
+                self._fallback_to_serial()
+                return []
+            self.sock_buffer += chunk
+        return unpack_batches(self.sock_buffer)
+
+    def _fallback_to_serial(self):
+        # Alten Wert verwerfen, damit die Druckregelung nicht auf einem eingefrorenen Messwert regelt
+        self.latest_displacement = None
+        try:
+            self.port = self.serial_port or self.auto_detect_port()
+            self.connect()
+        except Exception as e:
+            print(f"[MagneticSpringSensor] Fallback auf seriellen Port fehlgeschlagen: {e}")
+
+    def read_frames(self) -> list:
+        """Liest alle neuen, gültigen Frames als Dicts (inkl. Zeitstempel "t")."""
+        frames = self._read_server_frames() if self.sock else self._read_serial_frames()
+        if frames:
+            self.latest_displacement = frames[-1]["dst"]
+            self._update_frame_rate(len(frames))
+        return frames
+
+    def _update_frame_rate(self, count: int):
+        now = time.monotonic()
+        if now - self._rate_last > 1.0:
+            # Nach einer Lese- oder Sendepause enthält der Puffer nur einen (evtl. gekappten) Rückstand,
+            # der nichts über die Framerate aussagt → Messfenster ab jetzt neu beginnen
+            self._rate_start, self._rate_count = now, 0
+        else:
+            self._rate_count += count
+            elapsed = now - self._rate_start
+            if elapsed >= 1.0:
+                self.frame_rate = self._rate_count / elapsed
+                self._rate_count = 0
+                self._rate_start = now
+        self._rate_last = now
+
+    def _read_serial_frames(self) -> list:
+        frames = []
         if not self.ser or not self.ser.in_waiting:
-            return
+            return frames
 
         raw = self.ser.read(self.ser.in_waiting).decode('utf-8', errors='replace')
+        now = time.monotonic()
         self.buffer += raw
 
         while '\n' in self.buffer:
@@ -82,16 +168,28 @@ class MagneticSpringSensor:
             if not line:
                 continue
 
+            self.frames_total += 1
             valid, payload = self.verify_checksum(line)
             if not valid or not self.STRUCTURE_REGEX.match(payload):
+                # Struktur intakt, aber Prüfsumme falsch → Wertfehler, sonst Strukturfehler
+                if payload and self.STRUCTURE_REGEX.match(payload):
+                    self.value_errors += 1
+                else:
+                    self.struct_errors += 1
                 continue
 
             try:
                 data = json.loads(payload)
-                self.latest_displacement = data["dst"]
+                data["t"] = now
+                frames.append(data)
             except json.JSONDecodeError:
                 continue
 
+        return frames
+
+    def _read_new_value(self):
+        self.read_frames()
+
     def getCompression(self):
         self._read_new_value()
         return self.latest_displacement
@@ -0,0 +1,118 @@
+from bisect import bisect_right
+
+
+class PressureCalibration:
+    """
+    Vorberechnete Lookup-Tabelle Federweg (mm) → Kontaktdruck (MPa) mit linearer Interpolation.
+
+    Außerhalb der Tabelle wird mit der Steigung des Randsegments extrapoliert.
+    """
+
+    def __init__(self, displacements, pressures):
+        if len(displacements) < 2 or len(displacements) != len(pressures):
+            raise ValueError("Kalibrierung benötigt mindestens zwei Stützstellen gleicher Länge.")
+        points = sorted(zip(displacements, pressures))
+        self.xs = [float(x) for x, _ in points]
+        self.ys = [float(y) for _, y in points]
+        # Steigungen einmalig vorberechnen, damit die Regelschleife nur bisect + eine Multiplikation braucht
+        self.slopes = [(y1 - y0) / (x1 - x0)
+                       for x0, x1, y0, y1 in zip(self.xs, self.xs[1:], self.ys, self.ys[1:])]
+
+    @classmethod
+    def from_spring(cls, spring_constant: float, area_cm2: float = 5.0, max_displacement: float = 20.0,
+                    points: int = 201):
+        """Lineare Feder: F = k · s (N/mm · mm), p = F / A mit A in mm²."""
+        step = max_displacement / (points - 1)
+        displacements = [i * step for i in range(points)]
+        return cls(displacements, [spring_constant * d / (area_cm2 * 100) for d in displacements])
+
+    @classmethod
+    def from_forces(cls, displacements, forces, area_cm2: float = 5.0):
+        """Gemessene Kraftkennlinie (mm, N) für nichtlineare Federn."""
+        return cls(displacements, [f / (area_cm2 * 100) for f in forces])
+
+    def pressure(self, displacement: float) -> float:
+        i = min(max(bisect_right(self.xs, displacement) - 1, 0), len(self.slopes) - 1)
+        return self.ys[i] + self.slopes[i] * (displacement - self.xs[i])
+
+
+class PIController:
+    """PI-Regler mit Stellgrößenbegrenzung und Anti-Windup (Integrator wird bei Sättigung nicht weitergeführt)."""
+
+    def __init__(self, kp: float, ki: float, output_min: float, output_max: float):
+        self.kp = kp
+        self.ki = ki
+        self.output_min = output_min
+        self.output_max = output_max
+        self.integral = 0.0
+
+    def reset(self):
+        self.integral = 0.0
+
+    def update(self, error: float, dt: float) -> float:
+        integral = self.integral + error * dt
+        output = self.kp * error + self.ki * integral
+        if output > self.output_max:
+            return self.output_max
+        if output < self.output_min:
+            return self.output_min
+        self.integral = integral
+        return output
+
+
+class ControlStats:
+    """
+    Sammelt Kennzahlen der Regelschleife: Latenz, Periodenjitter, Überschwingen und Einschwingzeit.
+
+    Überschwingen zählt nur über das Ziel hinaus in Fahrtrichtung, die sich aus dem ersten Messwert ergibt
+    (wichtig für Sweep-Stufen, die unterhalb der vorherigen liegen).
+    """
+
+    def __init__(self, target: float, period: float, tolerance: float):
+        self.target = target
+        self.period = period
+        self.tolerance = tolerance
+        self.iterations = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.jitter_max = 0.0
+        self.direction = None  # +1 Druck aufbauen, -1 Druck abbauen
+        self.overshoot = 0.0
+        self.settle_time = None
+        self.hold_error_sum = 0.0
+        self.hold_samples = 0
+        self.started = None
+        self.last_tick = None
+
+    def record(self, tick: float, latency: float, pressure: float, holding: bool):
+        if self.started is None:
+            self.started = tick
+        if self.last_tick is not None:
+            self.jitter_max = max(self.jitter_max, abs(tick - self.last_tick - self.period))
+        self.last_tick = tick
+
+        self.iterations += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        if self.direction is None:
+            self.direction = 1.0 if pressure <= self.target else -1.0
+        self.overshoot = max(self.overshoot, (pressure - self.target) * self.direction)
+        if self.settle_time is None and abs(pressure - self.target) <= self.tolerance:
+            self.settle_time = tick - self.started
+        if holding:
+            self.hold_error_sum += abs(pressure - self.target)
+            self.hold_samples += 1
+
+    def summary(self) -> dict:
+        elapsed = (self.last_tick - self.started) if self.iterations > 1 else 0.0
+        return {
+            "target_mpa"       : self.target,
+            "iterations"       : self.iterations,
+            "loop_rate_hz"     : (self.iterations - 1) / elapsed if elapsed > 0 else None,
+            "latency_mean_ms"  : self.latency_sum / self.iterations * 1000 if self.iterations else None,
+            "latency_max_ms"   : self.latency_max * 1000,
+            "jitter_max_ms"    : self.jitter_max * 1000,
+            "overshoot_pct"    : self.overshoot / self.target * 100 if self.iterations else None,
+            "settle_time_s"    : self.settle_time,
+            "hold_error_mpa"   : self.hold_error_sum / self.hold_samples if self.hold_samples else None,
+        }
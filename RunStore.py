@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+
+from PressureControl import PressureCalibration
+from Samples import FIELDS, RunRecord, SampleBatch
+
+
+class RunStore:
+    """
+    Dauerhafte Aufzeichnung der Messzyklen als JSON-Lines-Datei (ein abgeschlossener RunRecord pro Zeile).
+
+    Die Datei wird nur angehängt; Lesen erfolgt zeilenweise, sodass Filter und Export auch bei
+    Tausenden Läufen mit konstantem Speicherbedarf arbeiten.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, run: RunRecord):
+        line = json.dumps(_to_dict(run), separators=(",", ":")) + "\n"
+        with self.lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def __iter__(self):
+        """Liefert alle beim Aufruf vollständig geschriebenen Läufe; währenddessen angehängte werden ignoriert."""
+        if not os.path.exists(self.path):
+            return
+        end = os.path.getsize(self.path)
+        calibrations = {}  # gleiche Kennlinie → gleiches Objekt (Analysis gruppiert nach Kalibrierung)
+        position = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                position += len(line)
+                if position > end or not line.endswith(b"\n"):
+                    break
+                yield _from_dict(json.loads(line), calibrations)
+
+    def last_run_id(self) -> int:
+        """run_id des zuletzt gespeicherten Laufs (0 ohne Aufzeichnung), liest nur das Dateiende."""
+        try:
+            with open(self.path, "rb") as f:
+                size = f.seek(0, os.SEEK_END)
+                tail = b""
+                while size > 0 and tail.count(b"\n") < 2:
+                    step = min(1 << 16, size)
+                    size -= step
+                    f.seek(size)
+                    tail = f.read(step) + tail
+        except FileNotFoundError:
+            return 0
+        complete = tail[:tail.rfind(b"\n") + 1].splitlines()
+        return json.loads(complete[-1])["run_id"] if complete else 0
+
+
+def _to_dict(run: RunRecord) -> dict:
+    samples = {field: run.samples[field].tolist() for field in FIELDS}
+    samples["final"] = run.samples.final.tolist()
+    calibration = run.calibration
+    return {
+        "run_id"     : run.run_id,
+        "started"    : run.started,
+        "batch"      : run.batch,
+        "targets"    : run.targets,
+        "target_unit": run.target_unit,
+        "reached"    : run.reached,
+        "area_cm2"   : run.area_cm2,
+        "calibration": {"xs": calibration.xs, "ys": calibration.ys} if calibration else None,
+        "samples"    : samples,
+    }
+
+
+def _from_dict(data: dict, calibrations: dict) -> RunRecord:
+    samples = SampleBatch()
+    for field in FIELDS:
+        getattr(samples, field).extend(data["samples"][field])
+    samples.final.extend(data["samples"]["final"])
+
+    calibration = data["calibration"]
+    if calibration is not None:
+        key = (tuple(calibration["xs"]), tuple(calibration["ys"]))
+        if key not in calibrations:
+            calibrations[key] = PressureCalibration(calibration["xs"], calibration["ys"])
+        calibration = calibrations[key]
+
+    run = RunRecord(data["run_id"], data["started"], data["batch"], samples, data["targets"], data["target_unit"],
+                    calibration, data["area_cm2"])
+    run.reached = data["reached"]
+    return run
@@ -0,0 +1,119 @@
+import math
+from array import array
+
+NAN = float("nan")
+
+FIELDS = ("t", "elevator", "compression", "voltage", "current", "resistance")
+# Nachkommastellen für Anzeige/Export – intern wird immer mit voller Genauigkeit gerechnet
+DISPLAY_PRECISION = {"t": 3, "elevator": 3, "compression": 3, "voltage": 3, "current": 3, "resistance": 2}
+
+
+def _display(value: float, digits: int):
+    return None if math.isnan(value) else round(value, digits)
+
+
+class Sample:
+    """Ein Messpunkt mit fester Struktur; nicht gemessene Größen sind NaN, t ist time.monotonic() bei Erfassung."""
+
+    __slots__ = FIELDS + ("final",)
+
+    def __init__(self, t: float, elevator: float = NAN, compression: float = NAN, voltage: float = NAN,
+                 current: float = NAN, resistance: float = NAN, final: bool = False):
+        self.t = t
+        self.elevator = elevator
+        self.compression = compression
+        self.voltage = voltage
+        self.current = current
+        self.resistance = resistance
+        self.final = final
+
+    def as_dict(self) -> dict:
+        """Gerundete Darstellung für Anzeige und Export, NaN wird zu None."""
+        data = {field: _display(getattr(self, field), DISPLAY_PRECISION[field]) for field in FIELDS}
+        data["final"] = self.final
+        return data
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"Sample({values})"
+
+
+class SampleBatch:
+    """Spaltenweise Sammlung von Samples (array('d') je Feld) für Aufzeichnung und Sammelübergabe."""
+
+    __slots__ = FIELDS + ("final",)
+
+    def __init__(self):
+        for field in FIELDS:
+            setattr(self, field, array("d"))
+        self.final = array("b")
+
+    def append(self, sample: Sample):
+        self.t.append(sample.t)
+        self.elevator.append(sample.elevator)
+        self.compression.append(sample.compression)
+        self.voltage.append(sample.voltage)
+        self.current.append(sample.current)
+        self.resistance.append(sample.resistance)
+        self.final.append(sample.final)
+
+    def extend(self, other: "SampleBatch"):
+        for field in self.__slots__:
+            getattr(self, field).extend(getattr(other, field))
+
+    def __len__(self):
+        return len(self.t)
+
+    def __getitem__(self, field: str):
+        # Spaltenzugriff wie bei einem Mapping, z. B. für Analysis.analyze_runs
+        if field not in self.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __iter__(self):
+        for i in range(len(self.t)):
+            yield self.sample(i)
+
+    def sample(self, index: int) -> Sample:
+        return Sample(self.t[index], self.elevator[index], self.compression[index], self.voltage[index],
+                      self.current[index], self.resistance[index], bool(self.final[index]))
+
+    def finals(self) -> list:
+        return [self.sample(i) for i, final in enumerate(self.final) if final]
+
+
+class RunRecord:
+    """
+    Aufzeichnung eines Messzyklus: Startzeit (time.time()), optionale Batch-Bezeichnung und alle Samples.
+
+    targets enthält die Zielwerte der Messpunkte (eine Stufe außer beim Sweep) in der Einheit target_unit
+    ("pressure" in MPa oder "compression" in mm), passend zur Reihenfolge von results.
+    calibration (PressureCalibration) und area_cm2 sind die beim Zyklus verwendeten Werte für die Analyse.
+    reached hält je Ergebnis fest, ob der Zielwert erreicht wurde (False z. B. bei Zeitüberschreitung der Regelung).
+    """
+
+    __slots__ = ("run_id", "started", "batch", "samples", "targets", "target_unit", "calibration", "area_cm2",
+                 "reached")
+
+    def __init__(self, run_id: int, started: float, batch, samples: SampleBatch, targets: list = None,
+                 target_unit: str = None, calibration=None, area_cm2: float = None):
+        self.run_id = run_id
+        self.started = started
+        self.batch = batch
+        self.samples = samples
+        self.targets = targets or []
+        self.target_unit = target_unit
+        self.calibration = calibration
+        self.area_cm2 = area_cm2
+        self.reached = []
+
+    @property
+    def results(self) -> list:
+        """Alle finalen Samples, bei einem Sweep eines pro Stufe."""
+        return self.samples.finals()
+
+    def target(self, step: int):
+        return self.targets[step] if step < len(self.targets) else None
+
+    def target_reached(self, step: int) -> bool:
+        return self.reached[step] if step < len(self.reached) else False
@@ -0,0 +1,206 @@
+import argparse
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from collections import deque
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "tpr_sensor.sock")
+
+# Binärformat: Batch-Header (Anzahl Records) gefolgt von festen Records
+# t (monotonic, s) | dst (mm) | raw | ocf | cof | lin
+BATCH_HEADER = struct.Struct("<H")
+RECORD = struct.Struct("<ddiBBB")
+
+
+def pack_record(frame: dict) -> bytes:
+    return RECORD.pack(frame["t"], frame["dst"], int(frame["raw"]),
+                       int(frame["ocf"]), int(frame["cof"]), int(frame["lin"]))
+
+
+def unpack_batches(buffer: bytearray) -> list:
+    """Dekodiert alle vollständigen Batches aus dem Puffer und entfernt sie daraus."""
+    frames = []
+    while len(buffer) >= BATCH_HEADER.size:
+        (count,) = BATCH_HEADER.unpack_from(buffer)
+        end = BATCH_HEADER.size + count * RECORD.size
+        if len(buffer) < end:
+            break
+        for t, dst, raw, ocf, cof, lin in RECORD.iter_unpack(bytes(buffer[BATCH_HEADER.size:end])):
+            frames.append({"t": t, "dst": dst, "raw": raw, "ocf": ocf, "cof": cof, "lin": lin})
+        del buffer[:end]
+    return frames
+
+
+class _Client:
+    def __init__(self, conn: socket.socket, queue_size: int):
+        self.conn = conn
+        self.queue = deque(maxlen=queue_size)  # volle Queue verwirft die ältesten Records
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.dropped = 0
+        self.alive = True
+
+
+class SensorServer:
+    """Besitzt den seriellen Port und verteilt dekodierte Samples an beliebig viele Clients."""
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, port=None, baudrate=115200,
+                 queue_size=1000, batch_size=64):
+        self.socket_path = socket_path
+        self.port = port
+        self.baudrate = baudrate
+        self.queue_size = queue_size
+        self.batch_size = min(batch_size, 0xFFFF)
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.stop_flag = threading.Event()
+        self.sensor = None
+        self.server_socket = None
+        self.reader = None
+
+    def start(self):
+        from MagneticSpringSensor import MagneticSpringSensor
+
+        # Vor dem Öffnen des seriellen Ports prüfen, ob bereits ein Server auf dem Socket läuft
+        if os.path.exists(self.socket_path):
+            if self._socket_alive():
+                raise RuntimeError(f"Auf {self.socket_path} läuft bereits ein SensorServer.")
+            os.unlink(self.socket_path)  # verwaister Socket eines beendeten Servers
+
+        # Direkt auf den seriellen Port, nicht auf einen (eventuell eigenen) Server verbinden
+        self.sensor = MagneticSpringSensor(port=self.port, baudrate=self.baudrate, socket_path=None)
+
+        self.server_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server_socket.bind(self.socket_path)
+        self.server_socket.listen()
+        self.server_socket.settimeout(0.5)
+        print(f"[SensorServer] Lausche auf {self.socket_path}")
+
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        self.reader = threading.Thread(target=self._read_loop, args=(self.sensor,), daemon=True)
+        self.reader.start()
+
+    def _socket_alive(self) -> bool:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self.stop_flag.is_set():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.stop_flag.set()
+        with self.clients_lock:
+            for client in self.clients:
+                self._drop_client(client)
+            self.clients.clear()
+        if self.server_socket:
+            self.server_socket.close()
+            self.server_socket = None
+            # Nur den eigenen Socket entfernen, nie den eines anderen Servers
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self.reader:
+            self.reader.join()  # Sensor erst schließen, wenn der Lese-Thread nicht mehr darauf zugreift
+            self.reader = None
+        if self.sensor:
+            self.sensor.disconnect()
+            self.sensor = None
+
+    def _accept_loop(self):
+        while not self.stop_flag.is_set():
+            try:
+                conn, _ = self.server_socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            client = _Client(conn, self.queue_size)
+            with self.clients_lock:
+                self.clients.append(client)
+            print(f"[SensorServer] Client verbunden ({len(self.clients)} aktiv)")
+            threading.Thread(target=self._send_loop, args=(client,), daemon=True).start()
+
+    def _read_loop(self, sensor):
+        while not self.stop_flag.is_set():
+            frames = sensor.read_frames()
+            if not frames:
+                time.sleep(0.001)
+                continue
+
+            # Einmal packen, an alle Clients verteilen
+            records = []
+            for frame in frames:
+                try:
+                    records.append(pack_record(frame))
+                except (TypeError, ValueError, struct.error):
+                    continue
+            with self.clients_lock:
+                clients = list(self.clients)
+            for client in clients:
+                with client.lock:
+                    client.dropped += max(0, len(client.queue) + len(records) - self.queue_size)
+                    client.queue.extend(records)
+                client.ready.set()
+
+    def _send_loop(self, client: _Client):
+        while client.alive and not self.stop_flag.is_set():
+            if not client.ready.wait(timeout=0.5):
+                continue
+            with client.lock:
+                count = min(len(client.queue), self.batch_size)
+                batch = [client.queue.popleft() for _ in range(count)]
+                if not client.queue:
+                    client.ready.clear()
+            if not batch:
+                continue
+            try:
+                client.conn.sendall(BATCH_HEADER.pack(len(batch)) + b"".join(batch))
+            except OSError:
+                break
+
+        with self.clients_lock:
+            if client in self.clients:
+                self.clients.remove(client)
+        self._drop_client(client)
+        print(f"[SensorServer] Client getrennt ({client.dropped} Records verworfen)")
+
+    @staticmethod
+    def _drop_client(client: _Client):
+        client.alive = False
+        client.ready.set()
+        try:
+            client.conn.close()
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Sensor-Server für den MagneticSpringSensor")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Pfad des Unix-Domain-Sockets")
+    parser.add_argument("--port", help="Serieller Port (Standard: Auto-Erkennung)")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--queue-size", type=int, default=1000, help="Maximale Records pro Client-Queue")
+    parser.add_argument("--batch-size", type=int, default=64, help="Maximale Records pro gesendetem Batch")
+    args = parser.parse_args()
+
+    SensorServer(args.socket, args.port, args.baudrate, args.queue_size, args.batch_size).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import csv
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from Backend import MeasurementBackend
+from Exporter import export_runs, filter_runs, parse_time
+from RunStore import RunStore
+
+# Schlüssel aus der Konfigurationsdatei, die direkt an das Backend gehen
+BACKEND_KEYS = ("current", "area_cm2", "target_compression", "settle_time", "tick_interval", "simulate",
+                "target_pressure", "kp", "ki", "control_rate", "max_speed", "approach_speed",
+                "pressure_tolerance", "control_timeout", "sweep", "sweep_unit", "max_runs", "record_path")
+RESULT_FIELDS = ["cycle", "plate", "step", "target", "reached", "timestamp", "voltage", "current", "resistance",
+                 "duration_s"]
+
+
+def load_config(path):
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="TPR Messung ohne GUI (Batch-Betrieb)")
+    parser.add_argument("-c", "--config", help="JSON-Konfigurationsdatei mit Mess- und Batchparametern")
+    parser.add_argument("-n", "--cycles", type=int, help="Anzahl der Messzyklen")
+    parser.add_argument("-p", "--plates", nargs="+", help="Liste der Platten-IDs (ein Zyklus pro Platte)")
+    parser.add_argument("-o", "--output", help="Ergebnisdatei (.csv oder .json)")
+    parser.add_argument("-e", "--export", help="Alle Samples der Zyklen exportieren (.csv oder .parquet)")
+    parser.add_argument("--batch", help="Batch-Bezeichnung für die aufgezeichneten Zyklen")
+    parser.add_argument("--record", help="Zyklen zusätzlich an diese Aufzeichnung (.jsonl) anhängen")
+    parser.add_argument("--export-recording", help="Keine Messung: Zyklen aus dieser Aufzeichnung nach --export "
+                                                   "schreiben (filterbar mit --export-from/-to/-batch)")
+    parser.add_argument("--export-from", help="Nur Zyklen ab diesem Zeitpunkt exportieren (ISO, z. B. 2024-05-01 14:30)")
+    parser.add_argument("--export-to", help="Nur Zyklen bis zu diesem Zeitpunkt exportieren (ISO)")
+    parser.add_argument("--export-batch", help="Nur Zyklen mit dieser Batch-Bezeichnung exportieren")
+    parser.add_argument("--pressure", type=float, help="Zieldruck in MPa (aktiviert die Druckregelung)")
+    parser.add_argument("--sweep", type=float, nargs="+", help="Stufen für einen Sweep in einem Kontaktzyklus")
+    parser.add_argument("--sweep-unit", choices=("pressure", "compression"), help="Einheit der Sweep-Stufen")
+    parser.add_argument("--simulate", action="store_true", default=None, help="Dummy-Hardware verwenden")
+    return parser.parse_args(argv)
+
+
+def write_results(results, path):
+    if path.lower().endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+    print(f"[CLI] {len(results)} Ergebnisse gespeichert in {path}")
+
+
+def print_summary(results, total_time):
+    resistances = [r["resistance"] for r in results if r["resistance"] is not None and r["reached"]]
+    durations = list({r["cycle"]: r["duration_s"] for r in results}.values())  # eine Dauer pro Zyklus
+    print(f"[CLI] Zyklen: {len(durations)} | Messpunkte: {len(results)} | gültig: {len(resistances)} | "
+          f"Gesamtdauer: {total_time:.1f} s")
+    if durations:
+        print(f"[CLI] Zykluszeit: Ø {statistics.mean(durations):.2f} s | "
+              f"Durchsatz: {len(durations) / total_time * 60:.1f} Zyklen/min")
+    if resistances:
+        print(f"[CLI] Flächenwiderstand (mΩ·cm²): Ø {statistics.mean(resistances):.2f} | "
+              f"min {min(resistances):.2f} | max {max(resistances):.2f}")
+
+
+def print_control_stats(stats):
+    def fmt(key, digits=2):
+        return "-" if stats[key] is None else f"{stats[key]:.{digits}f}"
+
+    print(f"[CLI]   Druckregelung {stats['target_mpa']} MPa: {fmt('loop_rate_hz', 1)} Hz | "
+          f"Latenz Ø {fmt('latency_mean_ms', 3)} / max {fmt('latency_max_ms', 3)} ms | "
+          f"Jitter max {fmt('jitter_max_ms')} ms | Überschwingen {fmt('overshoot_pct')} % | "
+          f"Einschwingzeit {fmt('settle_time_s')} s | Haltefehler {fmt('hold_error_mpa', 4)} MPa")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config(args.config)
+    if args.simulate is not None:
+        config["simulate"] = args.simulate
+    if args.pressure is not None:
+        config["target_pressure"] = args.pressure
+    if args.sweep:
+        config["sweep"] = args.sweep
+    if args.sweep_unit:
+        config["sweep_unit"] = args.sweep_unit
+    if args.record:
+        config["record_path"] = args.record
+
+    plates = args.plates or config.get("plates")
+    if plates is None:
+        cycles = args.cycles or config.get("cycles", 1)
+        plates = [None] * cycles
+    output = args.output or config.get("output")
+    export = args.export or config.get("export")
+
+    # Filter beziehen sich auf eine gespeicherte Aufzeichnung, in einem Messlauf teilen alle Zyklen denselben Batch
+    recording = args.export_recording or config.get("export_recording")
+    filters = {"start": parse_time(args.export_from or config.get("export_from")),
+               "end"  : parse_time(args.export_to or config.get("export_to")),
+               "batch": args.export_batch or config.get("export_batch")}
+    if recording:
+        if not export:
+            print("[CLI] --export-recording benötigt eine Exportdatei (--export).")
+            return 2
+        count = export_runs(filter_runs(RunStore(recording), **filters), export)
+        print(f"[CLI] {count} Zyklen aus {recording} exportiert nach {export}")
+        return 0
+    if any(value is not None for value in filters.values()):
+        print("[CLI] --export-from/--export-to/--export-batch gelten nur zusammen mit --export-recording.")
+        return 2
+
+    backend = MeasurementBackend(**{k: config[k] for k in BACKEND_KEYS if k in config})
+    backend.batch_label = args.batch or config.get("batch")
+    results = []
+    interrupted = False
+    batch_start = time.perf_counter()
+
+    def measure_cycles():
+        """Führt die Zyklen aus und liefert jeden RunRecord direkt an den Export weiter."""
+        nonlocal interrupted
+        try:
+            for cycle, plate in enumerate(plates, start=1):
+                cycle_start = time.perf_counter()
+                run = backend.run_cycle()
+                duration = time.perf_counter() - cycle_start
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                finals = [sample.as_dict() for sample in run.results]
+                stats = backend.last_control_stats
+                if isinstance(stats, dict):
+                    stats = [stats]
+
+                print(f"[CLI] Zyklus {cycle}/{len(plates)}{f' ({plate})' if plate else ''} in {duration:.2f} s")
+                for step, target in enumerate(run.targets):
+                    final = finals[step] if step < len(finals) else {}
+                    results.append({
+                        "cycle"     : cycle,
+                        "plate"     : plate,
+                        "step"      : step,
+                        "target"    : target,
+                        "reached"   : run.target_reached(step),
+                        "timestamp" : timestamp,
+                        "voltage"   : final.get("voltage"),
+                        "current"   : final.get("current"),
+                        "resistance": final.get("resistance"),
+                        "duration_s": round(duration, 3)
+                    })
+                    print(f"[CLI]   Stufe {step}{f' ({target})' if target is not None else ''}: "
+                          f"R = {final.get('resistance')} mΩ·cm²"
+                          f"{'' if run.target_reached(step) else ' – Ziel nicht erreicht'}")
+                    if stats and step < len(stats):
+                        print_control_stats(stats[step])
+                yield run
+        except KeyboardInterrupt:
+            # run_cycle hat Netzteil und Elevator bereits im finally-Block abgeschaltet
+            interrupted = True
+            print("[CLI] Abgebrochen – speichere bisherige Ergebnisse.")
+
+    try:
+        if export:
+            # Zyklen werden einzeln gestreamt, der Speicherbedarf hängt nicht von der Batchgröße ab
+            count = export_runs(measure_cycles(), export)
+            print(f"[CLI] {count} Zyklen exportiert nach {export}")
+        else:
+            for _ in measure_cycles():
+                pass
+    finally:
+        backend.shutdown()
+
+    if output:
+        write_results(results, output)
+    print_summary(results, time.perf_counter() - batch_start)
+
+    if interrupted:
+        return 130
+    if any(r["resistance"] is None or not r["reached"] for r in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
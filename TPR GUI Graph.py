@@ -1,15 +1,19 @@
+import math
+import os
 import time
 import tkinter as tk
 from datetime import datetime
-from tkinter import ttk
+from tkinter import filedialog, ttk
 
 import matplotlib.pyplot as plt
 from PIL import Image, ImageTk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
 from Backend import MeasurementBackend  # Importiere das neue Backend
+from Exporter import ExportJob, filter_runs, parse_time
 
 STATUS_STEPS = ["Bereit", "Kontaktieren", "Messen", "Zurückfahren"]
+RECORD_PATH = "messungen.jsonl"  # Aufzeichnung aller Zyklen für den Export
 
 
 class TPRGUI:
@@ -20,7 +24,7 @@ class TPRGUI:
         self.root.minsize(800, 800)
         self.root.configure(background="#1e1e1e")
 
-        self.backend = MeasurementBackend()
+        self.backend = MeasurementBackend(target_pressure=1.0, record_path=RECORD_PATH)  # Druckregelung auf 1 MPa
 
         self.root.tk.call("source", "azure.tcl")
         self.root.tk.call("set_theme", "dark")
@@ -87,9 +91,13 @@ class TPRGUI:
             tk.Label(info_frame, text=value, font=("Bahnschrift Light", 11, "bold"),
                      background="#1e1e1e", foreground="#009FE3").pack(side="left")
 
-        colored_info("Kontaktfläche: ", "5 cm²")
-        colored_info("    Druck: ", "1 MPa")
-        colored_info("    Strom: ", "1 A")
+        # Anzeige aus der tatsächlichen Backend-Konfiguration
+        colored_info("Kontaktfläche: ", f"{self.backend.area_cm2:g} cm²")
+        if self.backend.target_pressure is not None:
+            colored_info("    Druck: ", f"{self.backend.target_pressure:g} MPa")
+        else:
+            colored_info("    Federweg: ", f"{self.backend.target_compression:g} mm")
+        colored_info("    Strom: ", f"{self.backend.current:g} A")
 
         # Löschen und Stop Buttons
         bottom_right_controls = tk.Frame(main_top, background="#1e1e1e")
@@ -111,6 +119,13 @@ class TPRGUI:
         )
         self.stop_button.grid(row=0, column=1, sticky="e")
 
+        # Export-Button
+        self.export_button = ttk.Button(
+            bottom_right_controls, text="Exportieren", underline=0,
+            command=self.export_runs, style="Custom.TButton", width=20
+        )
+        self.export_button.grid(row=0, column=2, sticky="e", padx=(5, 0))
+
         # Diagrammbereich
         graph_frame = tk.Frame(self.root, background="#1e1e1e")
         graph_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
@@ -158,9 +173,14 @@ class TPRGUI:
         self.tree.configure(yscrollcommand=scrollbar.set)
 
         # Keybindings
-        self.root.bind_all("<m>", lambda e: self.start_measurement())
-        self.root.bind_all("<l>", lambda e: self.clear_table())
-        self.root.bind_all("<s>", lambda e: self.stop_measurement())
+        # Buchstaben-Kürzel nicht auslösen, während in ein Eingabefeld (Exportdialog) getippt wird
+        def shortcut(action):
+            return lambda e: None if isinstance(e.widget, (tk.Entry, ttk.Entry)) else action()
+
+        self.root.bind_all("<m>", shortcut(self.start_measurement))
+        self.root.bind_all("<l>", shortcut(self.clear_table))
+        self.root.bind_all("<s>", shortcut(self.stop_measurement))
+        self.root.bind_all("<e>", shortcut(self.export_runs))
         self.root.bind_all("<Control-c>", lambda e: self.stop_measurement())
 
     # Spinner starten
@@ -191,7 +211,7 @@ class TPRGUI:
         for lst in self.graph_data:
             lst.clear()
 
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.backend.start_measurement(callback=self.handle_measurement_update, on_done=self._on_measurement_done)
 
     def stop_measurement(self):
@@ -202,19 +222,14 @@ class TPRGUI:
         self.status_var.set("Bereit")
         self.start_button.config(state=tk.NORMAL)
 
-    def handle_measurement_update(self, data):
-        timestamp = round(time.time() - self.start_time, 2)
-
-        voltage = data.get("voltage")
-        current = data.get("current")
-        resistance = data.get("resistance")
-        elevator = data.get("elevator")
-        compression = data.get("compression")
+    def handle_measurement_update(self, sample):
+        # Zeitachse aus dem Erfassungszeitpunkt, nicht aus dem (verzögerten) Callback
+        timestamp = sample.t - self.start_time
 
-        values = [voltage, current, resistance, elevator, compression]
+        values = [sample.voltage, sample.current, sample.resistance, sample.elevator, sample.compression]
 
         for i, val in enumerate(values):
-            if val is not None:
+            if not math.isnan(val):
                 # robust: Zeit nur speichern, wenn Wert existiert
                 while len(self.time_data) <= i:
                     self.time_data.append([])  # initialisiere falls nötig
@@ -229,11 +244,91 @@ class TPRGUI:
                 ax.autoscale_view()
                 ax.figure.canvas.draw_idle()
 
-        if data.get("final") and resistance is not None:
+        if sample.final and not math.isnan(sample.resistance):
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.tree.insert("", "end", values=(now, f"{resistance:.2f}"))
+            self.tree.insert("", "end", values=(now, f"{sample.resistance:.2f}"))
             self.tree.yview_moveto(1)
 
+    # Export der aufgezeichneten Messungen im Hintergrund
+    def export_runs(self):
+        # Export aus der Aufzeichnung auf der Festplatte (enthält nur abgeschlossene Zyklen, ohne Obergrenze)
+        store = self.backend.store
+        if not os.path.exists(store.path):
+            self.status_var.set("Keine Messungen zum Exportieren")
+            return
+
+        selection = self._ask_export_filter()
+        if selection is None:
+            return
+        runs = filter_runs(store, selection["start"], selection["end"], selection["batch"])
+
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet")]
+        )
+        if not path:
+            return
+
+        self.export_button.config(state=tk.DISABLED)
+
+        def on_progress(done, total):
+            text = f"Export: {done} Messungen" if total is None else f"Export {done * 100 // total} %"
+            self.root.after(0, lambda: self.status_var.set(text))
+
+        def on_done(count, error):
+            def finish():
+                self.export_button.config(state=tk.NORMAL)
+                if error:
+                    self.status_var.set("Export fehlgeschlagen")
+                elif not count:
+                    self.status_var.set("Keine Messungen im gewählten Bereich")
+                else:
+                    self.status_var.set(f"{count} Messungen exportiert")
+            self.root.after(0, finish)
+
+        ExportJob(runs, path, on_progress=on_progress, on_done=on_done,
+                  results_only=selection["results_only"]).start()
+
+    def _ask_export_filter(self):
+        """Dialog für Zeitraum, Batch und Umfang des Exports; None bei Abbruch."""
+        dialog = tk.Toplevel(self.root, background="#1e1e1e")
+        dialog.title("Export")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        entries = {}
+        for row, (key, label) in enumerate([("start", "Von (JJJJ-MM-TT hh:mm):"), ("end", "Bis (JJJJ-MM-TT hh:mm):"),
+                                            ("batch", "Batch:")]):
+            tk.Label(dialog, text=label, font=("Bahnschrift Light", 11),
+                     background="#1e1e1e", foreground="white").grid(row=row, column=0, sticky="w", padx=10, pady=5)
+            entries[key] = ttk.Entry(dialog, width=22)
+            entries[key].grid(row=row, column=1, sticky="ew", padx=10, pady=5)
+        results_only = tk.BooleanVar(value=False)
+        ttk.Checkbutton(dialog, text="Nur Endergebnisse", variable=results_only).grid(
+            row=3, column=0, columnspan=2, sticky="w", padx=10, pady=5)
+        error_var = tk.StringVar()
+        tk.Label(dialog, textvariable=error_var, font=("Bahnschrift Light", 10),
+                 background="#1e1e1e", foreground="#E34F00").grid(row=4, column=0, columnspan=2, sticky="w", padx=10)
+
+        selection = {}
+
+        def confirm():
+            try:
+                selection.update(start=parse_time(entries["start"].get()), end=parse_time(entries["end"].get()))
+            except ValueError:
+                error_var.set("Ungültiges Datum")
+                return
+            selection.update(batch=entries["batch"].get().strip() or None, results_only=results_only.get())
+            dialog.destroy()
+
+        buttons = tk.Frame(dialog, background="#1e1e1e")
+        buttons.grid(row=5, column=0, columnspan=2, sticky="e", padx=10, pady=10)
+        ttk.Button(buttons, text="Exportieren", command=confirm, style="Custom.TButton").pack(side="left", padx=(0, 5))
+        ttk.Button(buttons, text="Abbrechen", command=dialog.destroy, style="Custom.TButton").pack(side="left")
+
+        self.root.wait_window(dialog)
+        return selection or None
+
     def clear_table(self):
         for item in self.tree.get_children():
             self.tree.delete(item)